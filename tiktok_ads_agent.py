@@ -3,19 +3,55 @@ TikTok Ads AI Agent
 """
 
 import os
+import re
 import json
-from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from dataclasses import dataclass, asdict, field, fields
 import random
-import time
+import itertools
+import threading
+from functools import lru_cache
 
 try:
-    from groq import Groq
+    from groq import AsyncGroq, DefaultAioHttpClient, RateLimitError, DEFAULT_MAX_RETRIES
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
     print("⚠️  Groq SDK not installed. Install with: pip install groq")
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_loads(data: str) -> Any:
+    """Parse JSON, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """Serialize to JSON, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys)
+
+
+_RNG = threading.local()
+
+
+def _rng() -> random.Random:
+    """Return this thread's Random instance, created on first use; the mock API draws from it."""
+    rng = getattr(_RNG, "rng", None)
+    if rng is None:
+        rng = _RNG.rng = random.Random()
+    return rng
+
 
 @dataclass
 class AdPayload:
@@ -41,43 +77,88 @@ class AdPayload:
 class MockTikTokAPI:
     """Mock TikTok API for realistic demonstration."""
 
-    VALID_MUSIC_IDS = [
+    VALID_MUSIC_IDS = frozenset({
         "music_123", "music_456", "music_789",
         "music_pop_2024", "music_trending_001",
         "music_viral_summer", "music_hiphop_beat"
-    ]
+    })
 
-    VALID_TOKENS = ["mock_token_12345", "act.demo.token.tiktok.ads.2024"]
+    VALID_TOKENS = frozenset({"mock_token_12345", "act.demo.token.tiktok.ads.2024"})
+
+    _MUSIC_PREFIX = "music_"
+
+    # Static part of each successful validation, built once at class load
+    _MUSIC_META = {
+        music_id: {
+            "valid": True,
+            "music_title": f"Track {music_id.split('_')[-1]}",
+            "message": "Music ID validated successfully"
+        }
+        for music_id in VALID_MUSIC_IDS
+    }
+
+    _EXPIRED_RE = re.compile(r"expired", re.IGNORECASE)
+
+    _VALID_TOKEN_RESPONSE = {
+        "valid": True,
+        "advertiser_id": "adv_123456",
+        "scopes": ["ad.create", "ad.read", "campaign.create"]
+    }
+
+    # Known tokens resolve with a single dict lookup
+    _TOKEN_RESPONSES = dict.fromkeys(VALID_TOKENS, _VALID_TOKEN_RESPONSE)
 
     @staticmethod
     def validate_token(token: str) -> Dict[str, Any]:
         """Validate access token."""
+        response = MockTikTokAPI._TOKEN_RESPONSES.get(token)
+        if response is not None:
+            return dict(response)
+        return MockTikTokAPI._validate_unknown_token(token)
+
+    @staticmethod
+    def _validate_unknown_token(token: str) -> Dict[str, Any]:
+        """Classify a token that is not in VALID_TOKENS."""
         if not token:
             return {"valid": False, "error": "No access token provided"}
 
-        if token in MockTikTokAPI.VALID_TOKENS or token.startswith("act."):
-            return {
-                "valid": True,
-                "advertiser_id": "adv_123456",
-                "scopes": ["ad.create", "ad.read", "campaign.create"]
-            }
+        if token.startswith("act."):
+            return dict(MockTikTokAPI._VALID_TOKEN_RESPONSE)
 
-        if "expired" in token.lower():
+        if MockTikTokAPI._EXPIRED_RE.search(token):
             return {"valid": False, "error": "TOKEN_EXPIRED", "message": "Access token has expired"}
 
         return {"valid": False, "error": "INVALID_TOKEN", "message": "Invalid access token"}
 
     @staticmethod
-    def validate_music_id(music_id: str) -> Dict[str, Any]:
-        """Validate music ID against mock TikTok library."""
-        if music_id in MockTikTokAPI.VALID_MUSIC_IDS:
-            return {
-                "valid": True,
-                "music_title": f"Track {music_id.split('_')[-1]}",
-                "duration": random.randint(15, 60),
-                "message": "Music ID validated successfully"
-            }
-        elif music_id.startswith("music_"):
+    def validate_music_id(music_ids: List[str]) -> Dict[str, Any]:
+        """Validate a batch of music IDs against mock TikTok library."""
+        return {
+            "results": [
+                {"music_id": music_id, **MockTikTokAPI.validate_single_music_id(music_id)}
+                for music_id in music_ids
+            ]
+        }
+
+    @staticmethod
+    def validate_single_music_id(music_id: str) -> Dict[str, Any]:
+        """Validate one music ID against mock TikTok library."""
+        return MockTikTokAPI.add_track_details(MockTikTokAPI.lookup_music_id(music_id))
+
+    @staticmethod
+    def add_track_details(lookup: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach per-request track details (duration) to a valid lookup result."""
+        if not lookup["valid"]:
+            return dict(lookup)
+        return {**lookup, "duration": _rng().randint(15, 60)}
+
+    @staticmethod
+    def lookup_music_id(music_id: str) -> Dict[str, Any]:
+        """Classify a music ID; the result depends only on the ID."""
+        hit = MockTikTokAPI._MUSIC_META.get(music_id)
+        if hit is not None:
+            return hit
+        elif music_id.startswith(MockTikTokAPI._MUSIC_PREFIX):
             return {
                 "valid": False,
                 "error_code": "MUSIC_NOT_FOUND",
@@ -91,11 +172,11 @@ class MockTikTokAPI:
             }
 
     @staticmethod
-    def upload_custom_music(file_info: str) -> Dict[str, Any]:
+    async def upload_custom_music(file_info: str) -> Dict[str, Any]:
         """Simulate custom music upload."""
-        time.sleep(0.5)
-        if random.random() > 0.2:
-            mock_music_id = f"music_custom_{random.randint(1000, 9999)}"
+        await asyncio.sleep(0.5)
+        if _rng().random() > 0.2:
+            mock_music_id = f"music_custom_{_rng().randint(1000, 9999)}"
             return {
                 "success": True,
                 "music_id": mock_music_id,
@@ -109,7 +190,7 @@ class MockTikTokAPI:
             }
 
     @staticmethod
-    def submit_ad(payload: Dict[str, Any], access_token: str) -> Dict[str, Any]:
+    async def submit_ad(payload: Dict[str, Any], access_token: str) -> Dict[str, Any]:
         """Submit ad to TikTok Ads API."""
         token_validation = MockTikTokAPI.validate_token(access_token)
         if not token_validation["valid"]:
@@ -122,14 +203,14 @@ class MockTikTokAPI:
                 "retry_possible": True
             }
 
-        time.sleep(1)
+        await asyncio.sleep(1)
 
         # 75% success rate
-        if random.random() > 0.25:
+        if _rng().random() > 0.25:
             return {
                 "success": True,
-                "ad_id": f"ad_{random.randint(100000, 999999)}",
-                "campaign_id": f"cmp_{random.randint(10000, 99999)}",
+                "ad_id": f"ad_{_rng().randint(100000, 999999)}",
+                "campaign_id": f"cmp_{_rng().randint(10000, 99999)}",
                 "message": "✅ Ad campaign created successfully!",
                 "payload": payload
             }
@@ -152,7 +233,27 @@ class MockTikTokAPI:
                 "retry_possible": True
             }
         ]
-        return random.choice(error_scenarios)
+        return _rng().choice(error_scenarios)
+
+
+@lru_cache(maxsize=1024)
+def _lookup_music_cached(music_id: str) -> Dict[str, Any]:
+    """Process-wide memo of the deterministic part of music ID validation."""
+    return MockTikTokAPI.lookup_music_id(music_id)
+
+
+def _music_ids_arg(tool_args: Dict[str, Any]) -> List[str]:
+    """Normalize the validate_music_id argument; models sometimes send a bare string."""
+    music_ids = tool_args.get("music_ids", tool_args.get("music_id"))
+    if isinstance(music_ids, str):
+        return [music_ids]
+    if isinstance(music_ids, list):
+        return [music_id for music_id in music_ids if isinstance(music_id, str)]
+    return []
+
+
+# Tools safe to cache per session; a cached validation also keeps its track duration
+CACHEABLE_TOOLS = frozenset({"validate_music_id"})
 
 
 # Tool definitions for function calling
@@ -161,16 +262,17 @@ TOOLS = [
         "type": "function",
         "function": {
             "name": "validate_music_id",
-            "description": "Validate a TikTok music ID to check if it exists in the library",
+            "description": "Validate one or more TikTok music IDs to check if they exist in the library. Pass all IDs to validate in a single call.",
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "music_id": {
-                        "type": "string",
-                        "description": "The music ID to validate (e.g., 'music_123')"
+                    "music_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "The music IDs to validate (e.g., ['music_123', 'music_456'])"
                     }
                 },
-                "required": ["music_id"]
+                "required": ["music_ids"]
             }
         }
     },
@@ -233,35 +335,7 @@ TOOLS = [
 ]
 
 
-class TikTokAdAgent:
-    """AI-powered TikTok Ads agent using LLM for intelligent conversation."""
-
-    def __init__(self, groq_api_key: Optional[str] = None, access_token: Optional[str] = None):
-        self.groq_api_key = groq_api_key
-        self.access_token = access_token or "act.demo.token.tiktok.ads.2024"
-        self.conversation_history: List[Dict[str, Any]] = []
-
-        if not GROQ_AVAILABLE:
-            raise Exception("Groq SDK is required for AI-powered mode. Install with: pip install groq")
-
-        if not groq_api_key:
-            raise Exception("GROQ_API_KEY is required. Set it as environment variable or pass it directly.")
-
-        try:
-            self.client = Groq(api_key=groq_api_key)
-            print("✅ Groq client initialized successfully")
-        except Exception as e:
-            raise Exception(f"Failed to initialize Groq: {e}")
-
-        # Validate access token
-        token_validation = MockTikTokAPI.validate_token(self.access_token)
-        if token_validation["valid"]:
-            print(f"✅ Access token validated")
-            print(f"   Advertiser ID: {token_validation['advertiser_id']}")
-        else:
-            print(f"⚠️  Access token validation failed: {token_validation.get('error')}")
-
-        self.system_prompt = """You are an expert TikTok Ads campaign assistant. Your job is to help users create valid ad campaigns through natural conversation.
+SYSTEM_PROMPT = """You are an expert TikTok Ads campaign assistant. Your job is to help users create valid ad campaigns through natural conversation.
 
 ## Your Personality:
 - Friendly, professional, and helpful
@@ -295,7 +369,7 @@ class TikTokAdAgent:
 - Music IDs must be validated before submission
 
 ## Available Tools:
-- `validate_music_id`: Check if a music ID exists
+- `validate_music_id`: Check if music IDs exist (when validating multiple IDs, pass them all in one call)
 - `upload_custom_music`: Upload custom music and get an ID
 - `submit_tiktok_ad`: Submit the complete campaign (ONLY when all info is collected and validated)
 
@@ -324,13 +398,231 @@ You: "Excellent! Since this is a Conversions campaign, music is required. Would
 - If music is required and user hasn't provided it, don't submit
 - Guide users through errors with clear next steps"""
 
-    def _execute_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Dict[str, Any]:
+# Built once so each turn only copies a reference to the system message.
+# This message and TOOLS form the request prefix the provider can reuse across
+# turns, so both must stay byte-identical for the session; per-user context
+# belongs in user messages, never in SYSTEM_PROMPT.
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+# The post-tool narration only needs to relay results, not the full rulebook
+_NARRATION_SYSTEM = {
+    "role": "system",
+    "content": (
+        "You are a TikTok Ads campaign assistant. Summarize the tool results for the user "
+        "in one or two friendly sentences. If submission succeeded, celebrate; if it failed, "
+        "suggest the next step."
+    )
+}
+
+
+# Fields of a submission result worth keeping in history; the echoed payload is dropped
+_SUBMIT_RESULT_FIELDS = ("success", "ad_id", "campaign_id", "error", "error_type", "message", "suggested_action")
+
+
+def _slim_tool_result(tool_name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip fields the LLM does not need before a tool result is stored in history."""
+    if tool_name == "submit_tiktok_ad":
+        return {key: result[key] for key in _SUBMIT_RESULT_FIELDS if key in result}
+
+    if tool_name == "validate_music_id" and "results" in result:
+        return {
+            "results": [
+                {key: value for key, value in item.items() if key != "duration"}
+                for item in result["results"]
+            ]
+        }
+
+    return result
+
+
+def _empty_payload() -> AdPayload:
+    """Slot-filling state for a campaign that has not collected anything yet."""
+    return AdPayload(campaign_name="", objective="", ad_text="", cta="")
+
+
+def _successful_submission(
+    calls: List[Tuple[str, Dict[str, Any]]], results: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Return the submit_tiktok_ad result if it succeeded, else None (needs narration)."""
+    for (tool_name, _), result in zip(calls, results):
+        if tool_name == "submit_tiktok_ad" and result.get("success"):
+            return result
+    return None
+
+
+# The tool-selection call only picks a tool or asks a short question, so it gets
+# a small, more deterministic budget; the post-tool narration gets more room.
+_MAX_TOK_TOOL = 256
+_MAX_TOK_FINAL = 800
+_TEMPERATURE_TOOL = 0.2
+_TEMPERATURE_FINAL = 0.7
+
+# Canned replies for trivial inputs that do not need the LLM
+GREETING_REPLY = "Hi! I'm your TikTok Ads assistant. What would you like to call your campaign?"
+RESET_REPLY = "🔄 Conversation reset. Starting fresh! What would you like to call your campaign?"
+THANKS_REPLY = "You're welcome! Let me know if there's anything else you'd like to set up."
+CLARIFY_REPLY = "Could you tell me a bit more? For example, the campaign name, objective, ad text or music you'd like."
+
+_SMALL_TALK_RE = re.compile(r"^(hi|hello|hey|thanks|thank you|ok|yes|no)\W*$")
+_SMALL_TALK_REPLIES = {
+    "thanks": THANKS_REPLY,
+    "thank you": THANKS_REPLY
+}
+
+# Older turns are paged out into a summary once history grows past this size
+MAX_HISTORY_MESSAGES = 20
+COMPACT_BATCH_SIZE = 10
+
+SUMMARY_PROMPT = """Summarize the following TikTok ad campaign conversation for your own future reference.
+Preserve every campaign detail collected so far (campaign_name, objective, ad_text, cta, music_id, music_option),
+any tool results (validated or uploaded music IDs, submission outcomes), and what the user still needs to provide.
+Be concise and factual."""
+
+
+def _render_transcript(messages: List[Dict[str, Any]]) -> str:
+    """Flatten chat messages into plain text for summarization."""
+    lines = []
+    for message in messages:
+        content = message.get("content") or ""
+        for tool_call in message.get("tool_calls", []):
+            function = tool_call["function"]
+            content += f" [called {function['name']}({function['arguments']})]"
+        lines.append(f"{message['role']}: {content.strip()}")
+    return "\n".join(lines)
+
+
+@dataclass
+class _StreamState:
+    """What a streamed completion produced besides its text."""
+    tool_calls: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    finish_reason: Optional[str] = None
+
+
+def _merge_tool_call_delta(tool_calls: Dict[int, Dict[str, Any]], fragment: Any):
+    """Accumulate a streamed tool-call fragment into the call at its index."""
+    call = tool_calls.setdefault(fragment.index, {
+        "id": "",
+        "type": "function",
+        "function": {"name": "", "arguments": ""}
+    })
+    if fragment.id:
+        call["id"] = fragment.id
+    if fragment.function is not None:
+        if fragment.function.name:
+            call["function"]["name"] += fragment.function.name
+        if fragment.function.arguments:
+            call["function"]["arguments"] += fragment.function.arguments
+
+
+async def _read_line(prompt: str) -> str:
+    """Read a line from stdin without blocking the event loop.
+
+    input() runs in a daemon thread rather than the default executor, so an
+    interrupted prompt never holds up interpreter shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(line: Optional[str], error: Optional[BaseException]):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(line)
+
+    def reader():
+        try:
+            line, error = input(prompt), None
+        except Exception as e:
+            line, error = None, e
+        try:
+            loop.call_soon_threadsafe(resolve, line, error)
+        except RuntimeError:
+            # The event loop already closed (e.g. after Ctrl+C); nobody is waiting
+            pass
+
+    threading.Thread(target=reader, daemon=True).start()
+    return await future
+
+
+class TikTokAdAgent:
+    """AI-powered TikTok Ads agent using LLM for intelligent conversation."""
+
+    def __init__(
+        self,
+        groq_api_key: Optional[str] = None,
+        access_token: Optional[str] = None,
+        groq_api_keys: Optional[List[str]] = None
+    ):
+        self.groq_api_key = groq_api_key
+        self.groq_api_keys = [key for key in (groq_api_keys or [groq_api_key]) if key]
+        self.access_token = access_token or "act.demo.token.tiktok.ads.2024"
+        self.conversation_history: List[Dict[str, Any]] = []
+        self._tool_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._memory_digest: Optional[str] = None
+        self.partial = _empty_payload()
+        self._compaction: Optional[asyncio.Task] = None
+        self._reply_restarted = False
+
+        if not GROQ_AVAILABLE:
+            raise Exception("Groq SDK is required for AI-powered mode. Install with: pip install groq")
+
+        if not self.groq_api_keys:
+            raise Exception("GROQ_API_KEY is required. Set it as environment variable or pass it directly.")
+
+        try:
+            # One pooled client per key, used round-robin. With several keys the SDK's own
+            # retries are disabled so a 429 moves to the next key instead of backing off.
+            max_retries = 0 if len(self.groq_api_keys) > 1 else DEFAULT_MAX_RETRIES
+            self._clients = [
+                AsyncGroq(api_key=key, http_client=DefaultAioHttpClient(), max_retries=max_retries)
+                for key in self.groq_api_keys
+            ]
+            self._client_cycle = itertools.cycle(self._clients)
+            print(f"✅ Groq client initialized successfully ({len(self._clients)} API key(s))")
+        except Exception as e:
+            raise Exception(f"Failed to initialize Groq: {e}")
+
+        # Validate access token
+        token_validation = MockTikTokAPI.validate_token(self.access_token)
+        if token_validation["valid"]:
+            print(f"✅ Access token validated")
+            print(f"   Advertiser ID: {token_validation['advertiser_id']}")
+        else:
+            print(f"⚠️  Access token validation failed: {token_validation.get('error')}")
+
+    async def _execute_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool call and return results."""
+        cache_key = None
+        if tool_name in CACHEABLE_TOOLS:
+            cache_key = (tool_name, _json_dumps(tool_args, sort_keys=True))
+            if cache_key in self._tool_cache:
+                return dict(self._tool_cache[cache_key])
+
+        result = await self._dispatch_tool(tool_name, tool_args)
+
+        if cache_key is not None:
+            self._tool_cache[cache_key] = result
+            result = dict(result)
+        return result
+
+    async def _dispatch_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Dict[str, Any]:
+        """Route a tool call to the matching TikTok API operation."""
         if tool_name == "validate_music_id":
-            return MockTikTokAPI.validate_music_id(tool_args["music_id"])
+            music_ids = _music_ids_arg(tool_args)
+            if not music_ids:
+                return {"error": "music_ids must be a list of music ID strings"}
+            # Same shape as MockTikTokAPI.validate_music_id, but each lookup goes through the memo
+            return {
+                "results": [
+                    {"music_id": music_id, **MockTikTokAPI.add_track_details(_lookup_music_cached(music_id))}
+                    for music_id in music_ids
+                ]
+            }
 
         elif tool_name == "upload_custom_music":
-            return MockTikTokAPI.upload_custom_music(tool_args.get("file_info", "user_upload.mp3"))
+            return await MockTikTokAPI.upload_custom_music(tool_args.get("file_info", "user_upload.mp3"))
 
         elif tool_name == "submit_tiktok_ad":
             payload = {
@@ -342,111 +634,356 @@ You: "Excellent! Since this is a Conversions campaign, music is required. Would
                     "music_id": tool_args.get("music_id")
                 }
             }
-            return MockTikTokAPI.submit_ad(payload, self.access_token)
+            return await MockTikTokAPI.submit_ad(payload, self.access_token)
 
         return {"error": "Unknown tool"}
 
-    def chat(self, user_input: str) -> str:
-        """Main chat interface using AI."""
-        # Add user message to history
+    async def _execute_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Execute independent tool calls concurrently, preserving call order.
+
+        A failing tool does not cancel the others; its exception becomes an
+        error result so every tool call still gets a reply in history.
+        """
+        results = await asyncio.gather(
+            *(self._execute_tool(name, args) for name, args in calls),
+            return_exceptions=True
+        )
+        return [
+            {"error": f"{name} failed: {result}"} if isinstance(result, Exception) else result
+            for (name, _), result in zip(calls, results)
+        ]
+
+    async def _create_completion(self, **kwargs) -> Any:
+        """Create a chat completion on the next API key, retrying once on the following key if rate limited."""
+        try:
+            return await next(self._client_cycle).chat.completions.create(**kwargs)
+        except RateLimitError:
+            if len(self._clients) == 1:
+                raise
+            print("⚠️  Groq rate limit hit, retrying with the next API key")
+            return await next(self._client_cycle).chat.completions.create(**kwargs)
+
+    def _context_messages(self, system_msg: Dict[str, str] = _SYSTEM_MSG) -> List[Dict[str, Any]]:
+        """Build the message list sent to the LLM: system prompt, memory digest, recent turns."""
+        messages = [system_msg]
+
+        if self._memory_digest is not None:
+            messages.append({
+                "role": "system",
+                "content": (
+                    "Earlier turns of this conversation have been removed from your context. "
+                    "Rely on this summary for anything said before the messages below:\n"
+                    f"{self._memory_digest}"
+                )
+            })
+
+        messages.extend(self.conversation_history)
+
+        # Collected fields go last so changes to them never invalidate the cached prefix
+        collected = {key: value for key, value in asdict(self.partial).items() if value}
+        if collected:
+            messages.append({
+                "role": "system",
+                "content": f"Collected fields: {_json_dumps(collected)}"
+            })
+
+        return messages
+
+    def _update_partial(self, calls: List[Tuple[str, Dict[str, Any]]], results: List[Dict[str, Any]]):
+        """Merge campaign fields learned from tool calls into the partial payload."""
+        field_names = {field.name for field in fields(AdPayload)}
+        for (tool_name, tool_args), result in zip(calls, results):
+            if tool_name == "submit_tiktok_ad":
+                for key, value in tool_args.items():
+                    if key in field_names and value:
+                        setattr(self.partial, key, value)
+
+            elif tool_name == "upload_custom_music" and result.get("success"):
+                self.partial.music_id = result["music_id"]
+                self.partial.music_option = "custom"
+
+            elif tool_name == "validate_music_id":
+                # Validating several candidates is not a choice; only record an unambiguous track
+                results = result.get("results", [])
+                if len(results) == 1 and results[0].get("valid"):
+                    self.partial.music_id = results[0]["music_id"]
+                    self.partial.music_option = "existing"
+
+    async def _compact_history(self):
+        """Page the oldest turns out of history into the running memory digest."""
+        if len(self.conversation_history) <= MAX_HISTORY_MESSAGES:
+            return
+
+        # Cut on a user message so tool results never lose their tool_calls message
+        split = next(
+            (i for i in range(COMPACT_BATCH_SIZE, len(self.conversation_history))
+             if self.conversation_history[i]["role"] == "user"),
+            None
+        )
+        if split is None:
+            return
+
+        transcript = _render_transcript(self.conversation_history[:split])
+        if self._memory_digest:
+            transcript = f"Previous summary:\n{self._memory_digest}\n\nNew turns:\n{transcript}"
+
+        try:
+            response = await self._create_completion(
+                model="llama-3.3-70b-versatile",
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript}
+                ],
+                temperature=0.2,
+                max_tokens=400
+            )
+        except Exception as e:
+            # Keep the full history and try again next turn
+            print(f"⚠️  Could not summarize conversation history: {e}")
+            return
+
+        self._memory_digest = response.choices[0].message.content
+        del self.conversation_history[:split]
+
+    async def _stream_completion(self, state: _StreamState, **kwargs) -> AsyncIterator[str]:
+        """Stream a completion, yielding text deltas and recording tool calls and finish reason in state."""
+        stream = await self._create_completion(
+            model="llama-3.3-70b-versatile",
+            stream=True,
+            **kwargs
+        )
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta
+
+            if delta.content:
+                yield delta.content
+
+            for fragment in delta.tool_calls or []:
+                _merge_tool_call_delta(state.tool_calls, fragment)
+
+            if choice.finish_reason:
+                state.finish_reason = choice.finish_reason
+
+    def reset(self):
+        """Forget the current conversation and start a new campaign."""
+        if self._compaction is not None:
+            self._compaction.cancel()
+            self._compaction = None
+        self.conversation_history = []
+        self._tool_cache.clear()
+        self._memory_digest = None
+        self.partial = _empty_payload()
+
+    def _local_reply(self, user_input: str) -> Optional[str]:
+        """Answer trivial inputs without an LLM round-trip; None means the LLM is needed."""
+        text = user_input.strip().lower()
+
+        if text == "reset":
+            self.reset()
+            return RESET_REPLY
+
+        match = _SMALL_TALK_RE.match(text)
+        if match:
+            word = match.group(1)
+            if word in _SMALL_TALK_REPLIES:
+                return _SMALL_TALK_REPLIES[word]
+            # Greetings and bare yes/no/ok only need the LLM once a conversation is underway
+            return None if self.conversation_history else GREETING_REPLY
+
+        # Mid-conversation a short answer like "1" may pick one of the agent's options
+        if not text or (len(text) < 3 and not self.conversation_history):
+            return CLARIFY_REPLY
+
+        return None
+
+    async def chat(self, user_input: str) -> AsyncIterator[str]:
+        """Main chat interface using AI. Yields the assistant reply as it streams in."""
+        local_reply = self._local_reply(user_input)
+        if local_reply is not None:
+            yield local_reply
+            return
+
+        # Summarizing old turns runs in the background after a reply, off the latency path
+        if self._compaction is not None:
+            await self._compaction
+            self._compaction = None
+
+        async for token in self._chat_turn(user_input):
+            yield token
+
+        self._compaction = asyncio.create_task(self._compact_history())
+
+    async def _chat_turn(self, user_input: str) -> AsyncIterator[str]:
+        """Run one conversation turn against the LLM, executing any tool calls."""
+        self._reply_restarted = False
+
+        # History is append-only so earlier turns stay a cacheable prefix
         self.conversation_history.append({
             "role": "user",
             "content": user_input
         })
 
         # Prepare messages for API call
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            *self.conversation_history
-        ]
+        messages = self._context_messages()
 
         try:
             # Call Groq with function calling
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
+            content_parts: List[str] = []
+            state = _StreamState()
+            async for token in self._stream_completion(
+                state,
                 messages=messages,
                 tools=TOOLS,
                 tool_choice="auto",
-                temperature=0.7,
-                max_tokens=2000
-            )
-
-            assistant_message = response.choices[0].message
-
-            # Handle tool calls
-            if assistant_message.tool_calls:
-                # Add assistant message with tool calls to history
+                temperature=_TEMPERATURE_TOOL,
+                max_tokens=_MAX_TOK_TOOL
+            ):
+                content_parts.append(token)
+                yield token
+
+            content = "".join(content_parts)
+
+            if state.finish_reason == "length":
+                # The small budget cut the reply or a tool call short; redo it with the full budget
+                shown = content
+                state = _StreamState()
+                content = "".join([
+                    token async for token in self._stream_completion(
+                        state,
+                        messages=messages,
+                        tools=TOOLS,
+                        tool_choice="auto",
+                        temperature=_TEMPERATURE_TOOL,
+                        max_tokens=_MAX_TOK_FINAL
+                    )
+                ])
+                # Only show what the user has not already seen
+                remainder = content[len(shown):] if content.startswith(shown) else f"\n{content}"
+                if remainder:
+                    yield remainder
+
+            if state.tool_calls and state.finish_reason == "length":
+                # Never dispatch a tool call whose arguments were cut off mid-stream
+                notice = "⚠️ My reply was cut off before I could finish that step. Could you say that again?"
                 self.conversation_history.append({
                     "role": "assistant",
-                    "content": assistant_message.content or "",
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments
-                            }
-                        } for tc in assistant_message.tool_calls
-                    ]
+                    "content": f"{content}\n{notice}" if content else notice
                 })
+                yield f"\n{notice}" if content else notice
+                return
 
-                # Execute each tool call
-                for tool_call in assistant_message.tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
+            # Handle tool calls
+            if state.tool_calls:
+                ordered_calls = [state.tool_calls[index] for index in sorted(state.tool_calls)]
+
+                # Malformed arguments become error results so every call still gets a reply
+                calls = []
+                parse_errors: Dict[int, Dict[str, Any]] = {}
+                for index, tool_call in enumerate(ordered_calls):
+                    tool_name = tool_call["function"]["name"]
+                    try:
+                        tool_args = _json_loads(tool_call["function"]["arguments"] or "{}")
+                        if not isinstance(tool_args, dict):
+                            raise ValueError("arguments must be a JSON object")
+                    except ValueError as e:
+                        parse_errors[index] = {"error": f"Invalid arguments for {tool_name}: {e}"}
+                        tool_args = {}
+                        # Keep the stored call well-formed so later requests are not rejected
+                        tool_call["function"]["arguments"] = "{}"
 
                     print(f"\n🔧 Calling tool: {tool_name}")
-                    print(f"   Arguments: {json.dumps(tool_args, indent=2)}")
+                    print(f"   Arguments: {_json_dumps(tool_args, indent=True)}")
 
-                    tool_result = self._execute_tool(tool_name, tool_args)
+                    calls.append((tool_name, tool_args))
 
-                    print(f"   Result: {json.dumps(tool_result, indent=2)}")
+                # Add assistant message with tool calls to history
+                self.conversation_history.append({
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": ordered_calls
+                })
+
+                # Execute the well-formed tool calls concurrently; results come back in call order
+                runnable = [index for index in range(len(calls)) if index not in parse_errors]
+                executed = iter(await self._execute_tools([calls[index] for index in runnable]))
+                tool_results = [
+                    parse_errors[index] if index in parse_errors else next(executed)
+                    for index in range(len(calls))
+                ]
+                self._update_partial(calls, tool_results)
+
+                for tool_call, tool_result in zip(ordered_calls, tool_results):
+                    print(f"\n   {tool_call['function']['name']} result: {_json_dumps(tool_result, indent=True)}")
 
                     # Add tool result to history
                     self.conversation_history.append({
                         "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps(tool_result)
+                        "tool_call_id": tool_call["id"],
+                        "content": _json_dumps(_slim_tool_result(tool_call["function"]["name"], tool_result))
                     })
 
-                # Get final response after tool execution
-                messages = [
-                    {"role": "system", "content": self.system_prompt},
-                    *self.conversation_history
-                ]
+                # What follows is a new reply after the tool output
+                self._reply_restarted = True
+
+                # A successful submission ends the flow; a templated reply is enough
+                submitted = _successful_submission(calls, tool_results)
+                if submitted is not None:
+                    # The campaign is done; the next one starts with empty slots
+                    self.partial = _empty_payload()
+                    self._tool_cache.clear()
+                    final_content = (
+                        f"✅ Ad {submitted['ad_id']} created under campaign {submitted['campaign_id']}!"
+                    )
+                    self.conversation_history.append({
+                        "role": "assistant",
+                        "content": final_content
+                    })
+                    yield final_content
+                    return
+
+                # Get final response after tool execution with the short narration prompt
+                messages = self._context_messages(_NARRATION_SYSTEM)
 
-                final_response = self.client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
+                final_parts: List[str] = []
+                async for token in self._stream_completion(
+                    _StreamState(),
                     messages=messages,
-                    temperature=0.7,
-                    max_tokens=2000
-                )
+                    temperature=_TEMPERATURE_FINAL,
+                    max_tokens=_MAX_TOK_FINAL
+                ):
+                    final_parts.append(token)
+                    yield token
 
-                final_content = final_response.choices[0].message.content
                 self.conversation_history.append({
                     "role": "assistant",
-                    "content": final_content
+                    "content": "".join(final_parts)
                 })
 
-                return final_content
-
             else:
-                # No tool calls, just return the response
-                content = assistant_message.content
+                # No tool calls, the streamed text is the whole response
                 self.conversation_history.append({
                     "role": "assistant",
                     "content": content
                 })
-                return content
 
         except Exception as e:
             error_msg = f"❌ Error communicating with AI: {str(e)}"
             print(error_msg)
-            return error_msg
+            yield error_msg
 
     def start(self):
         """Start the interactive CLI session."""
+        try:
+            asyncio.run(self._start_async())
+        except KeyboardInterrupt:
+            print("\n\n👋 Thanks for using TikTok Ads AI Agent!")
+
+    async def _start_async(self):
+        """Run the CLI session on the event loop, closing the Groq clients on exit."""
         print("=" * 70)
         print("🎵 TikTok Ads AI Agent")
         print("Powered by Groq LLM with Function Calling")
@@ -457,27 +994,35 @@ You: "Excellent! Since this is a Conversions campaign, music is required. Would
         # Initial greeting
         print("Agent: Hi! I'm your TikTok Ads assistant. I can help you create a new ad campaign. What would you like to call your campaign?\n")
 
+        try:
+            await self._cli_loop()
+        finally:
+            for client in self._clients:
+                await client.close()
+
+    async def _cli_loop(self):
+        """Read user input and print streamed replies until the user quits."""
         while True:
             try:
-                user_input = input("You: ").strip()
+                user_input = (await _read_line("You: ")).strip()
 
                 if user_input.lower() in ['quit', 'exit', 'q']:
                     print("\n👋 Thanks for using TikTok Ads AI Agent!")
                     break
 
-                if user_input.lower() == 'reset':
-                    self.conversation_history = []
-                    print("\n🔄 Conversation reset. Starting fresh!\n")
-                    print("Agent: Hi! I'm your TikTok Ads assistant. What would you like to call your campaign?\n")
-                    continue
-
                 if not user_input:
                     continue
 
-                response = self.chat(user_input)
-                print(f"\nAgent: {response}\n")
+                print("\nAgent: ", end="", flush=True)
+                async for token in self.chat(user_input):
+                    if self._reply_restarted:
+                        # Tools ran mid-turn; label the follow-up reply printed under their output
+                        self._reply_restarted = False
+                        print("\nAgent: ", end="", flush=True)
+                    print(token, end="", flush=True)
+                print("\n")
 
-            except KeyboardInterrupt:
+            except EOFError:
                 print("\n\n👋 Thanks for using TikTok Ads AI Agent!")
                 break
             except Exception as e:
@@ -485,10 +1030,11 @@ You: "Excellent! Since this is a Conversions campaign, music is required. Would
 
 
 if __name__ == "__main__":
-    # Get API key from environment variable
+    # Get API key(s) from environment; GROQ_API_KEYS takes a comma-separated list
     groq_api_key = os.getenv("GROQ_API_KEY")
+    groq_api_keys = [key.strip() for key in os.getenv("GROQ_API_KEYS", "").split(",") if key.strip()]
 
-    if not groq_api_key:
+    if not groq_api_key and not groq_api_keys:
         print("\n❌ ERROR: GROQ_API_KEY environment variable not set!")
         print("\nPlease set your Groq API key:")
         print("  export GROQ_API_KEY='your_api_key_here'")
@@ -502,7 +1048,8 @@ if __name__ == "__main__":
     try:
         agent = TikTokAdAgent(
             groq_api_key=groq_api_key,
-            access_token=access_token
+            access_token=access_token,
+            groq_api_keys=groq_api_keys or None
         )
         agent.start()
     except Exception as e: